@@ -2,6 +2,7 @@
 import elasticapm
 import functools
 import hashlib
+import json
 import jwt
 
 from flask import current_app, Blueprint, jsonify, make_response, request, session as flsk_session, Response, abort
@@ -287,6 +288,21 @@ def stream_binary_response(reader, status_code=200):
     return Response(generate(), status=status_code, mimetype='application/octet-stream')
 
 
+def stream_event_response(events, status_code=200):
+    quota_user = flsk_session.pop("quota_user", None)
+    quota_set = flsk_session.pop("quota_set", False)
+    if quota_user and quota_set:
+        QUOTA_TRACKER.end(quota_user)
+
+    def generate():
+        for event_type, data in events:
+            yield f"event: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+    headers = {"Cache-Control": "no-cache",
+               "X-Accel-Buffering": "no"}
+    return Response(generate(), status=status_code, headers=headers, mimetype='text/event-stream')
+
+
 #####################################
 # API list API (API inception)
 @api.route("/")
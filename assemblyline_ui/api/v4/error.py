@@ -1,15 +1,21 @@
+import hashlib
+import json
 
 from flask import request
 
 from assemblyline.datastore.exceptions import SearchException
 from assemblyline_ui.config import STORAGE
 from assemblyline_ui.api.base import api_login, make_api_response, make_subapi_blueprint
+from assemblyline_ui.helper.cache import TTLCache
 
 
 SUB_API = 'error'
 error_api = make_subapi_blueprint(SUB_API, api_version=4)
 error_api._doc = "Perform operations on service errors"
 
+# The error list is polled by the UI, cache the search results for a few seconds
+LIST_ERRORS_CACHE = TTLCache(maxsize=1024, ttl=2)
+
 
 @error_api.route("/<error_key>/", methods=["GET"])
 @api_login(required_priv=['R'])
@@ -45,6 +51,9 @@ def get_error(error_key, **kwargs):
 def list_errors(**_):
     """
     List all error in the system (per page)
+    Note: Results are cached for 2 seconds. The response includes an ETag header,
+          send it back in the If-None-Match header to get a 304 response when the
+          results have not changed.
 
     Variables:
     None
@@ -75,9 +84,21 @@ def list_errors(**_):
     use_archive = request.args.get('use_archive', "false").lower() in ['true', '']
     track_total_hits = request.args.get('track_total_hits', False)
 
-    try:
-        return make_api_response(STORAGE.error.search(query, offset=offset, rows=rows, as_obj=False,
-                                                      sort=sort, use_archive=use_archive,
-                                                      track_total_hits=track_total_hits, filters=filters))
-    except SearchException as e:
-        return make_api_response("", f"The specified search query is not valid. ({e})", 400)
+    cache_key = (query, tuple(filters) if filters else None, offset, rows, sort, use_archive, track_total_hits)
+    cached = LIST_ERRORS_CACHE.get(cache_key)
+    if cached is None:
+        try:
+            result = STORAGE.error.search(query, offset=offset, rows=rows, as_obj=False, sort=sort,
+                                          use_archive=use_archive, track_total_hits=track_total_hits,
+                                          filters=filters)
+        except SearchException as e:
+            return make_api_response("", f"The specified search query is not valid. ({e})", 400)
+
+        etag = hashlib.sha256(json.dumps(result, sort_keys=True).encode()).hexdigest()
+        cached = (etag, result)
+        LIST_ERRORS_CACHE.set(cache_key, cached)
+
+    etag, result = cached
+    response = make_api_response(result)
+    response.set_etag(etag)
+    return response.make_conditional(request)
@@ -1,6 +1,7 @@
+import concurrent.futures
 import json
 import os
-import shutil
+import tempfile
 from assemblyline.common.classification import InvalidClassification
 
 from flask import request
@@ -10,15 +11,16 @@ from assemblyline.common.dict_utils import flatten
 from assemblyline.common.isotime import now_as_iso
 from assemblyline.common.str_utils import safe_str
 from assemblyline.common.uid import get_random_id
+from assemblyline.filestore import FileStoreException
 from assemblyline.odm.messages.submission import Submission
 from assemblyline.remote.datatypes.queues.named import NamedQueue
-from assemblyline_ui.api.base import api_login, make_api_response, make_subapi_blueprint
+from assemblyline_ui.api.base import api_login, make_api_response, make_subapi_blueprint, stream_event_response
 from assemblyline_ui.config import CLASSIFICATION as Classification, IDENTIFY, TEMP_SUBMIT_DIR, \
     STORAGE, config, FILESTORE
-from assemblyline_ui.helper.service import ui_to_submission_params
+from assemblyline_ui.helper.queue import drain_queue, get_queue, push_batch
 from assemblyline_ui.helper.submission import download_from_url, FileTooBigException, InvalidUrlException, \
     ForbiddenLocation, submission_received
-from assemblyline_ui.helper.user import load_user_settings
+from assemblyline_ui.helper.user import load_user_submission_params
 
 
 SUB_API = 'ingest'
@@ -30,6 +32,17 @@ ingest = NamedQueue(
     host=config.core.redis.persistent.host,
     port=config.core.redis.persistent.port)
 MAX_SIZE = config.submission.max_file_size
+STREAM_TIMEOUT = 30
+FORCE_UPLOAD_SIZE = 1024 * 1024
+MAX_BULK_SUBMISSIONS = 100
+SAFE_PARAMS = {
+    'deep_scan': False,
+    "priority": 150,
+    "ignore_cache": False,
+    "ignore_dynamic_recursion_prevention": False,
+    "ignore_filtering": False,
+    "type": "INGEST"
+}
 
 
 # noinspection PyUnusedLocal
@@ -51,9 +64,9 @@ def get_message(notification_queue, **kwargs):
     Result example:
     {}          # A message
     """
-    u = NamedQueue("nq-%s" % notification_queue,
-                   host=config.core.redis.persistent.host,
-                   port=config.core.redis.persistent.port)
+    u = get_queue("nq-%s" % notification_queue,
+                  host=config.core.redis.persistent.host,
+                  port=config.core.redis.persistent.port)
 
     msg = u.pop(blocking=False)
 
@@ -79,23 +92,313 @@ def get_all_messages(notification_queue, **kwargs):
     Result example:
     []            # List of messages
     """
-    resp_list = []
-    u = NamedQueue("nq-%s" % notification_queue,
-                   host=config.core.redis.persistent.host,
-                   port=config.core.redis.persistent.port)
+    u = get_queue("nq-%s" % notification_queue,
+                  host=config.core.redis.persistent.host,
+                  port=config.core.redis.persistent.port)
 
-    while True:
-        msg = u.pop(blocking=False)
+    return make_api_response(drain_queue(u))
 
-        if msg is None:
-            break
 
-        resp_list.append(msg)
+# noinspection PyUnusedLocal
+@ingest_api.route("/stream/<notification_queue>/", methods=["GET"])
+@api_login(required_priv=['R'], allow_readonly=False)
+def stream_messages(notification_queue, **kwargs):
+    """
+    Stream the messages of the specified notification queue as server-sent events
+    Note: Each message is pushed to the client as soon as it is received. The stream
+          is closed if no message was received during the timeout period.
+
+    Variables:
+    notification_queue       => Queue to get the messages from
+
+    Arguments:
+    timeout                  => Seconds to wait for a message before closing the stream (Default: 30)
+
+    Data Block:
+    None
+
+    Result example:
+    event: message  # One event per message
+    data: {}        # A message
+    """
+    try:
+        timeout = min(max(int(request.args.get('timeout', STREAM_TIMEOUT)), 1), STREAM_TIMEOUT)
+    except ValueError:
+        return make_api_response({}, "timeout should be an int", 400)
+
+    def events():
+        u = get_queue("nq-%s" % notification_queue,
+                      host=config.core.redis.persistent.host,
+                      port=config.core.redis.persistent.port)
+        while True:
+            msg = u.pop(timeout=timeout)
+            if msg is None:
+                yield 'timeout', None
+                break
+
+            yield 'message', msg
+
+    return stream_event_response(events())
+
+
+class IngestionException(Exception):
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.status_code = status_code
+
 
-    return make_api_response(resp_list)
+def _safe_filename(name):
+    name = os.path.basename(name)
+    # safe_str leaves printable ASCII untouched, no need to validate the UTF-8 sequences in that common case
+    if name.isascii() and name.isprintable():
+        return name
+    return safe_str(name)
+
+
+def _flatten_metadata(metadata):
+    # Submitted metadata is most often already flat, only walk it recursively when it is not
+    if any(isinstance(v, dict) for v in metadata.values()):
+        return flatten(metadata)
+    return dict(metadata)
 
 
 # noinspection PyBroadException
+def _prepare_submission(data, name, user, binary=None, sha256=None, url=None):
+    """Download, identify and save the file to ingest then build the Submission object that will be queued."""
+    os.makedirs(TEMP_SUBMIT_DIR, exist_ok=True)
+    extracted_path = None
+    with tempfile.TemporaryDirectory(dir=TEMP_SUBMIT_DIR) as out_dir:
+        try:
+            # Get notification queue parameters
+            notification_queue = data.get('notification_queue', None)
+            notification_threshold = data.get('notification_threshold', None)
+            if not isinstance(notification_threshold, int) and notification_threshold:
+                raise IngestionException("notification_threshold should be and int", 400)
+
+            # Get file name
+            if not name:
+                raise IngestionException("Filename missing", 400)
+
+            name = _safe_filename(name)
+            if not name:
+                raise IngestionException("Invalid filename", 400)
+
+            out_file = os.path.join(out_dir, name)
+
+            # Prepare variables
+            extra_meta = {}
+            fileinfo = None
+            do_upload = True
+            in_filestore = False
+            al_meta = {}
+
+            # Load default user params, reset dangerous user settings to safe values and apply provided params
+            s_params = {**load_user_submission_params(user), **SAFE_PARAMS, **data.get("params", {})}
+
+            # Check if external submit is allowed
+            default_external_sources = s_params.pop('default_external_sources', [])
+
+            # Load file
+            if not binary:
+                if sha256:
+                    fileinfo = STORAGE.file.get_if_exists(sha256, as_obj=False,
+                                                          archive_access=config.datastore.ilm.update_archive)
+                    if fileinfo and not Classification.is_accessible(user['classification'],
+                                                                     fileinfo['classification']):
+                        raise IngestionException("SHA256 does not exist in Assemblyline", 404)
+
+                    # Try the download directly instead of testing if the file exists first, it saves a round
+                    # trip to the filestore and a missing file is simply a failed download
+                    try:
+                        FILESTORE.download(sha256, out_file)
+                        in_filestore = True
+                    except FileStoreException:
+                        in_filestore = False
+
+                    if in_filestore:
+                        if fileinfo:
+                            # File's classification must be applied at a minimum
+                            s_params['classification'] = Classification.max_classification(
+                                s_params['classification'], fileinfo['classification'])
+                        else:
+                            # File is in storage and the DB no need to upload anymore
+                            do_upload = False
+                    elif default_external_sources:
+                        dl_from = None
+                        available_sources = [x for x in config.submission.sha256_sources
+                                             if Classification.is_accessible(user['classification'],
+                                                                             x.classification) and
+                                             x.name in default_external_sources]
+                        try:
+                            for source in available_sources:
+                                src_url = source.url.replace(source.replace_pattern, sha256)
+                                src_data = source.data.replace(source.replace_pattern, sha256) if source.data else None
+                                failure_pattern = source.failure_pattern.encode('utf-8') \
+                                    if source.failure_pattern else None
+                                dl_from = download_from_url(src_url, out_file, data=src_data, method=source.method,
+                                                            headers=source.headers, proxies=source.proxies,
+                                                            verify=source.verify, validate=False,
+                                                            failure_pattern=failure_pattern)
+                                if dl_from:
+                                    # Apply minimum classification for the source
+                                    s_params['classification'] = \
+                                        Classification.max_classification(s_params['classification'],
+                                                                          source.classification)
+                                    extra_meta['original_source'] = source.name
+                                    break
+                        except FileTooBigException:
+                            raise IngestionException("File too big to be scanned.", 400)
+
+                        if not dl_from:
+                            raise IngestionException(
+                                "SHA256 does not exist in Assemblyline or any of the selected sources", 404)
+                    else:
+                        raise IngestionException("SHA256 does not exist in Assemblyline", 404)
+                elif url:
+                    if not config.ui.allow_url_submissions:
+                        raise IngestionException("URL submissions are disabled in this system", 400)
+
+                    try:
+                        if not download_from_url(url, out_file, headers=config.ui.url_submission_headers,
+                                                 proxies=config.ui.url_submission_proxies):
+                            raise IngestionException("Submitted URL cannot be found.", 400)
+
+                        extra_meta['submitted_url'] = url
+                    except FileTooBigException:
+                        raise IngestionException("File too big to be scanned.", 400)
+                    except InvalidUrlException:
+                        raise IngestionException("Url provided is invalid.", 400)
+                    except ForbiddenLocation:
+                        raise IngestionException("Hostname in this URL cannot be resolved.", 400)
+                else:
+                    raise IngestionException("Missing file to scan. No binary, sha256 or url provided.", 400)
+            else:
+                binary.save(out_file)
+
+            if do_upload and os.path.getsize(out_file) == 0:
+                raise IngestionException("File empty. Ingestion failed", 400)
+
+            # Apply group params if not specified
+            if 'groups' not in s_params:
+                s_params['groups'] = user['groups']
+
+            # Get generate alert parameter
+            generate_alert = data.get('generate_alert', s_params.get('generate_alert', False))
+            if not isinstance(generate_alert, bool):
+                raise IngestionException("generate_alert should be a boolean", 400)
+
+            # Override final parameters
+            s_params.update({
+                'generate_alert': generate_alert,
+                'max_extracted': config.core.ingester.default_max_extracted,
+                'max_supplementary': config.core.ingester.default_max_supplementary,
+                'priority': min(s_params.get("priority", 150), config.ui.ingest_max_priority),
+                'submitter': user['uname']
+            })
+
+            # Enforce maximum DTL
+            if config.submission.max_dtl > 0:
+                s_params['ttl'] = min(
+                    int(s_params['ttl']),
+                    config.submission.max_dtl) if int(s_params['ttl']) else config.submission.max_dtl
+
+            # No need to re-calculate fileinfo if we have it already
+            if not fileinfo:
+                # Calculate file digest (hashes, size and magic are all computed in a single pass over the file)
+                fileinfo = IDENTIFY.fileinfo(out_file)
+
+                # Validate file size
+                if fileinfo['size'] > MAX_SIZE and not s_params.get('ignore_size', False):
+                    msg = f"File too large ({fileinfo['size']} > {MAX_SIZE}). Ingestion failed"
+                    raise IngestionException(msg, 413)
+                elif fileinfo['size'] == 0:
+                    raise IngestionException("File empty. Ingestion failed", 400)
+
+                # Decode cart if needed (only the header is read unless the file actually is a cart)
+                extracted_path, fileinfo, al_meta = decode_file(out_file, fileinfo, IDENTIFY)
+                if extracted_path:
+                    out_file = extracted_path
+
+            # Alter filename and classification based on CaRT output
+            meta_classification = al_meta.pop('classification', s_params['classification'])
+            if meta_classification != s_params['classification']:
+                try:
+                    s_params['classification'] = Classification.max_classification(meta_classification,
+                                                                                   s_params['classification'])
+                except InvalidClassification as ic:
+                    raise IngestionException("The classification found inside the cart file cannot be merged with "
+                                             f"the classification the file was submitted as: {str(ic)}", 400)
+            name = al_meta.pop('name', name)
+
+            # Validate ingest classification
+            if not Classification.is_accessible(user['classification'], s_params['classification']):
+                raise IngestionException("You cannot start a submission with higher "
+                                         "classification then you're allowed to see", 400)
+
+            # Freshen file object and save the file to the filestore if needs be. These writes are independent
+            # from each other and from building the submission object so they are all done in parallel.
+            # Also no need to test if exist before upload because it already does that. Small files that did not
+            # come from the filestore are even uploaded without testing since the key is the file's hash and
+            # overwriting is cheaper than testing
+            expiry = now_as_iso(s_params['ttl'] * 24 * 60 * 60) if s_params.get('ttl', None) else None
+            with concurrent.futures.ThreadPoolExecutor(2) as executor:
+                writes = [executor.submit(STORAGE.save_or_freshen_file, fileinfo['sha256'], fileinfo, expiry,
+                                          s_params['classification'])]
+                if do_upload:
+                    writes.append(executor.submit(FILESTORE.upload, out_file, fileinfo['sha256'], location='far',
+                                                  force=not in_filestore and fileinfo['size'] < FORCE_UPLOAD_SIZE))
+
+                # Setup notification queue if needed
+                if notification_queue:
+                    notification_params = {
+                        "queue": notification_queue,
+                        "threshold": notification_threshold
+                    }
+                else:
+                    notification_params = {}
+
+                # Load metadata, setup some default values if they are missing and append the cart metadata
+                ingest_id = get_random_id()
+                metadata = _flatten_metadata(data.get("metadata", {}))
+                metadata['ingest_id'] = ingest_id
+                metadata['type'] = s_params['type']
+                metadata.update(al_meta)
+                if 'ts' not in metadata:
+                    metadata['ts'] = now_as_iso()
+                metadata.update(extra_meta)
+
+                # Set description if it does not exists
+                s_params['description'] = \
+                    s_params['description'] or f"[{s_params['type']}] Inspection of file: {name}"
+
+                # Create submission object, the ODM validation has to happen here otherwise an invalid
+                # submission would only be rejected by the ingester after we returned an ingest_id
+                try:
+                    submission_obj = Submission({
+                        "sid": ingest_id,
+                        "files": [{'name': name, 'sha256': fileinfo['sha256'], 'size': fileinfo['size']}],
+                        "notification": notification_params,
+                        "metadata": metadata,
+                        "params": s_params
+                    })
+                except (ValueError, KeyError) as e:
+                    raise IngestionException(str(e), 400)
+
+            # Make sure the file is saved before the submission gets queued
+            for write in writes:
+                write.result()
+
+            return submission_obj
+
+        finally:
+            # Cleanup the extracted file, the temporary directory takes care of the original file
+            try:
+                if extracted_path and os.path.exists(extracted_path):
+                    os.unlink(extracted_path)
+            except Exception:
+                pass
+
+
 @ingest_api.route("/", methods=["POST"])
 @api_login(required_priv=['W'], allow_readonly=False)
 def ingest_single_file(**kwargs):
@@ -166,271 +469,98 @@ def ingest_single_file(**kwargs):
     { "ingest_id": <ID OF THE INGESTED FILE> }
     """
     user = kwargs['user']
-    out_dir = os.path.join(TEMP_SUBMIT_DIR, get_random_id())
-    extracted_path = original_file = None
-    try:
-        # Get data block and binary blob
-        if 'multipart/form-data' in request.content_type:
-            if 'json' in request.values:
-                data = json.loads(request.values['json'])
-            else:
-                data = {}
-            binary = request.files['bin']
-            name = data.get("name", binary.filename)
-            sha256 = None
-            url = None
-        elif 'application/json' in request.content_type:
-            data = request.json
-            binary = None
-            sha256 = data.get('sha256', None)
-            url = data.get('url', None)
-            name = data.get("name", None) or sha256 or os.path.basename(url) or None
+
+    # Get data block and binary blob
+    if 'multipart/form-data' in request.content_type:
+        if 'json' in request.values:
+            data = json.loads(request.values['json'])
         else:
-            return make_api_response({}, "Invalid content type", 400)
+            data = {}
+        binary = request.files['bin']
+        name = data.get("name", binary.filename)
+        sha256 = None
+        url = None
+    elif 'application/json' in request.content_type:
+        data = request.json
+        binary = None
+        sha256 = data.get('sha256', None)
+        url = data.get('url', None)
+        name = data.get("name", None) or sha256 or os.path.basename(url) or None
+    else:
+        return make_api_response({}, "Invalid content type", 400)
+
+    if not data:
+        return make_api_response({}, "Missing data block", 400)
 
-        if not data:
-            return make_api_response({}, "Missing data block", 400)
+    try:
+        submission_obj = _prepare_submission(data, name, user, binary=binary, sha256=sha256, url=url)
+    except IngestionException as e:
+        return make_api_response({}, err=str(e), status_code=e.status_code)
 
-        # Get notification queue parameters
-        notification_queue = data.get('notification_queue', None)
-        notification_threshold = data.get('notification_threshold', None)
-        if not isinstance(notification_threshold, int) and notification_threshold:
-            return make_api_response({}, "notification_threshold should be and int", 400)
+    # Send submission object for processing
+    ingest.push(submission_obj.as_primitives())
+    submission_received(submission_obj)
 
-        # Get file name
-        if not name:
-            return make_api_response({}, "Filename missing", 400)
+    return make_api_response({"ingest_id": submission_obj.sid})
 
-        name = safe_str(os.path.basename(name))
-        if not name:
-            return make_api_response({}, "Invalid filename", 400)
 
-        try:
-            os.makedirs(out_dir)
-        except Exception:
-            pass
-        original_file = out_file = os.path.join(out_dir, name)
-
-        # Prepare variables
-        extra_meta = {}
-        fileinfo = None
-        do_upload = True
-        al_meta = {}
-
-        # Load default user params
-        s_params = ui_to_submission_params(load_user_settings(user))
-
-        # Reset dangerous user settings to safe values
-        s_params.update({
-            'deep_scan': False,
-            "priority": 150,
-            "ignore_cache": False,
-            "ignore_dynamic_recursion_prevention": False,
-            "ignore_filtering": False,
-            "type": "INGEST"
-        })
-
-        # Apply provided params
-        s_params.update(data.get("params", {}))
-
-        # Check if external submit is allowed
-        default_external_sources = s_params.pop('default_external_sources', [])
-
-        # Load file
-        if not binary:
-            if sha256:
-                fileinfo = STORAGE.file.get_if_exists(sha256, as_obj=False,
-                                                      archive_access=config.datastore.ilm.update_archive)
-                if FILESTORE.exists(sha256):
-                    if fileinfo:
-                        if not Classification.is_accessible(user['classification'], fileinfo['classification']):
-                            return make_api_response({}, "SHA256 does not exist in Assemblyline", 404)
-                        else:
-                            # File's classification must be applied at a minimum
-                            s_params['classification'] = Classification.max_classification(s_params['classification'],
-                                                                                           fileinfo['classification'])
-                    else:
-                        # File is in storage and the DB no need to upload anymore
-                        do_upload = False
-                    # File exists in the filestore and the user has appropriate file access
-                    FILESTORE.download(sha256, out_file)
-                elif default_external_sources:
-                    dl_from = None
-                    available_sources = [x for x in config.submission.sha256_sources
-                                         if Classification.is_accessible(user['classification'],
-                                                                         x.classification) and
-                                         x.name in default_external_sources]
-                    try:
-                        for source in available_sources:
-                            src_url = source.url.replace(source.replace_pattern, sha256)
-                            src_data = source.data.replace(source.replace_pattern, sha256) if source.data else None
-                            failure_pattern = source.failure_pattern.encode('utf-8') if source.failure_pattern else None
-                            dl_from = download_from_url(src_url, out_file, data=src_data, method=source.method,
-                                                        headers=source.headers, proxies=source.proxies,
-                                                        verify=source.verify, validate=False,
-                                                        failure_pattern=failure_pattern)
-                            if dl_from:
-                                # Apply minimum classification for the source
-                                s_params['classification'] = \
-                                    Classification.max_classification(s_params['classification'],
-                                                                      source.classification)
-                                extra_meta['original_source'] = source.name
-                                break
-                    except FileTooBigException:
-                        return make_api_response({}, "File too big to be scanned.", 400)
+@ingest_api.route("/bulk/", methods=["POST"])
+@api_login(required_priv=['W'], allow_readonly=False)
+def ingest_bulk(**kwargs):
+    """
+    Ingest multiple sha256 or URLs in the system in a single call
 
-                    if not dl_from:
-                        return make_api_response(
-                            {},
-                            "SHA256 does not exist in Assemblyline or any of the selected sources", 404)
-                else:
-                    return make_api_response({}, "SHA256 does not exist in Assemblyline", 404)
-            elif url:
-                if not config.ui.allow_url_submissions:
-                    return make_api_response({}, "URL submissions are disabled in this system", 400)
+        Note:
+            A maximum of 100 submissions can be sent per call, they are all queued in a single round trip.
+            All submissions are validated in order before any of them is queued. Validation stops at the
+            first invalid submission and the error message identifies it. Nothing is queued in that case
+            but the files of the submissions before it may already have been saved in the system.
+            Submitting binaries is not supported by this API, use the single file ingest API instead.
 
-                try:
-                    if not download_from_url(url, out_file, headers=config.ui.url_submission_headers,
-                                             proxies=config.ui.url_submission_proxies):
-                        return make_api_response({}, "Submitted URL cannot be found.", 400)
-
-                    extra_meta['submitted_url'] = url
-                except FileTooBigException:
-                    return make_api_response({}, "File too big to be scanned.", 400)
-                except InvalidUrlException:
-                    return make_api_response({}, "Url provided is invalid.", 400)
-                except ForbiddenLocation:
-                    return make_api_response({}, "Hostname in this URL cannot be resolved.", 400)
-            else:
-                return make_api_response({}, "Missing file to scan. No binary, sha256 or url provided.", 400)
-        else:
-            binary.save(out_file)
-
-        if do_upload and os.path.getsize(out_file) == 0:
-            return make_api_response({}, err="File empty. Ingestion failed", status_code=400)
-
-        # Apply group params if not specified
-        if 'groups' not in s_params:
-            s_params['groups'] = user['groups']
-
-        # Get generate alert parameter
-        generate_alert = data.get('generate_alert', s_params.get('generate_alert', False))
-        if not isinstance(generate_alert, bool):
-            return make_api_response({}, "generate_alert should be a boolean", 400)
-
-        # Override final parameters
-        s_params.update({
-            'generate_alert': generate_alert,
-            'max_extracted': config.core.ingester.default_max_extracted,
-            'max_supplementary': config.core.ingester.default_max_supplementary,
-            'priority': min(s_params.get("priority", 150), config.ui.ingest_max_priority),
-            'submitter': user['uname']
-        })
-
-        # Enforce maximum DTL
-        if config.submission.max_dtl > 0:
-            s_params['ttl'] = min(
-                int(s_params['ttl']),
-                config.submission.max_dtl) if int(s_params['ttl']) else config.submission.max_dtl
-
-        # No need to re-calculate fileinfo if we have it already
-        if not fileinfo:
-            # Calculate file digest
-            fileinfo = IDENTIFY.fileinfo(out_file)
-
-            # Validate file size
-            if fileinfo['size'] > MAX_SIZE and not s_params.get('ignore_size', False):
-                msg = f"File too large ({fileinfo['size']} > {MAX_SIZE}). Ingestion failed"
-                return make_api_response({}, err=msg, status_code=413)
-            elif fileinfo['size'] == 0:
-                return make_api_response({}, err="File empty. Ingestion failed", status_code=400)
-
-            # Decode cart if needed
-            extracted_path, fileinfo, al_meta = decode_file(out_file, fileinfo, IDENTIFY)
-            if extracted_path:
-                out_file = extracted_path
-
-        # Alter filename and classification based on CaRT output
-        meta_classification = al_meta.pop('classification', s_params['classification'])
-        if meta_classification != s_params['classification']:
-            try:
-                s_params['classification'] = Classification.max_classification(meta_classification,
-                                                                               s_params['classification'])
-            except InvalidClassification as ic:
-                return make_api_response({}, "The classification found inside the cart file cannot be merged with "
-                                             f"the classification the file was submitted as: {str(ic)}", 400)
-        name = al_meta.pop('name', name)
-
-        # Validate ingest classification
-        if not Classification.is_accessible(user['classification'], s_params['classification']):
-            return make_api_response({}, "You cannot start a submission with higher "
-                                     "classification then you're allowed to see", 400)
-
-        # Freshen file object
-        expiry = now_as_iso(s_params['ttl'] * 24 * 60 * 60) if s_params.get('ttl', None) else None
-        STORAGE.save_or_freshen_file(fileinfo['sha256'], fileinfo, expiry, s_params['classification'])
-
-        # Save the file to the filestore if needs be
-        # also no need to test if exist before upload because it already does that
-        if do_upload:
-            FILESTORE.upload(out_file, fileinfo['sha256'], location='far')
-
-        # Setup notification queue if needed
-        if notification_queue:
-            notification_params = {
-                "queue": notification_queue,
-                "threshold": notification_threshold
-            }
-        else:
-            notification_params = {}
-
-        # Load metadata, setup some default values if they are missing and append the cart metadata
-        ingest_id = get_random_id()
-        metadata = flatten(data.get("metadata", {}))
-        metadata['ingest_id'] = ingest_id
-        metadata['type'] = s_params['type']
-        metadata.update(al_meta)
-        if 'ts' not in metadata:
-            metadata['ts'] = now_as_iso()
-        metadata.update(extra_meta)
-
-        # Set description if it does not exists
-        s_params['description'] = s_params['description'] or f"[{s_params['type']}] Inspection of file: {name}"
-
-        # Create submission object
-        try:
-            submission_obj = Submission({
-                "sid": ingest_id,
-                "files": [{'name': name, 'sha256': fileinfo['sha256'], 'size': fileinfo['size']}],
-                "notification": notification_params,
-                "metadata": metadata,
-                "params": s_params
-            })
-        except (ValueError, KeyError) as e:
-            return make_api_response({}, err=str(e), status_code=400)
+    Variables:
+    None
 
-        # Send submission object for processing
-        ingest.push(submission_obj.as_primitives())
-        submission_received(submission_obj)
+    Arguments:
+    None
+
+    Data Block:
+    [                                # List of submissions, the same data block as the single
+     {"sha256": "1234...CDEF",       #   file ingest API with either a sha256 or a url
+      "metadata": {"key": val}},
+     {"url": "http://...",
+      "notification_queue": "my_queue"},
+     ...
+    ]
 
-        return make_api_response({"ingest_id": ingest_id})
+    Result example:
+    { "ingest_ids": [<ID OF THE FIRST INGESTED FILE>, ...] }
+    """
+    user = kwargs['user']
+    data = request.json
 
-    finally:
-        # Cleanup files on disk
-        try:
-            if original_file and os.path.exists(original_file):
-                os.unlink(original_file)
-        except Exception:
-            pass
+    if not data or not isinstance(data, list):
+        return make_api_response({}, "Data block should be a list of submissions", 400)
 
-        try:
-            if extracted_path and os.path.exists(extracted_path):
-                os.unlink(extracted_path)
-        except Exception:
-            pass
+    if len(data) > MAX_BULK_SUBMISSIONS:
+        return make_api_response({}, f"Too many submissions, a maximum of {MAX_BULK_SUBMISSIONS} "
+                                     "submissions can be sent per call", 400)
+
+    submissions = []
+    for idx, item in enumerate(data):
+        if not isinstance(item, dict) or not item:
+            return make_api_response({}, f"Submission #{idx}: Missing data block", 400)
 
+        sha256 = item.get('sha256', None)
+        url = item.get('url', None)
+        name = item.get("name", None) or sha256 or (url and os.path.basename(url)) or None
         try:
-            if os.path.exists(out_dir):
-                shutil.rmtree(out_dir, ignore_errors=True)
-        except Exception:
-            pass
+            submissions.append(_prepare_submission(item, name, user, sha256=sha256, url=url))
+        except IngestionException as e:
+            return make_api_response({}, err=f"Submission #{idx}: {str(e)}", status_code=e.status_code)
+
+    # Send all submission objects for processing at once
+    push_batch(ingest, [submission_obj.as_primitives() for submission_obj in submissions])
+    for submission_obj in submissions:
+        submission_received(submission_obj)
+
+    return make_api_response({"ingest_ids": [submission_obj.sid for submission_obj in submissions]})
@@ -1,13 +1,44 @@
 
-from assemblyline_ui.api.base import api_login, make_api_response, make_subapi_blueprint
+from assemblyline_ui.api.base import api_login, make_api_response, make_subapi_blueprint, stream_event_response
 from assemblyline_ui.config import STORAGE, CLASSIFICATION as Classification
-from assemblyline.remote.datatypes.queues.named import NamedQueue
+from assemblyline_ui.helper.queue import drain_queue, get_queue
 from assemblyline_core.dispatching.client import DispatchClient
 
 SUB_API = 'live'
 live_api = make_subapi_blueprint(SUB_API, api_version=4)
 live_api._doc = "Interact with live processing messages"
 
+dispatch_client = DispatchClient(datastore=STORAGE)
+
+STREAM_TIMEOUT = 30
+
+# Response templates shared by every request, the responses built from them must never be modified
+TIMEOUT_RESPONSE = {'type': 'timeout', 'err_msg': 'Timeout waiting for a message.', 'status_code': 408, 'msg': None}
+STATUS_RESPONSES = {
+    'STOP': {'type': 'stop', 'err_msg': None, 'status_code': 200, 'msg': "All messages received, closing queue..."},
+    'START': {'type': 'start', 'err_msg': None, 'status_code': 200, 'msg': "Start listening..."},
+}
+CACHE_KEY_RESPONSES = {
+    'OK': {'type': 'cachekey', 'err_msg': None, 'status_code': 200},
+    'FAIL': {'type': 'cachekeyerr', 'err_msg': None, 'status_code': 200},
+}
+
+
+def _parse_message(msg):
+    if msg is None:
+        return TIMEOUT_RESPONSE
+
+    status = msg.get('status', None)
+    response = STATUS_RESPONSES.get(status, None)
+    if response is not None:
+        return response
+
+    template = CACHE_KEY_RESPONSES.get(status, None)
+    if template is not None:
+        return {**template, 'msg': msg['cache_key']}
+
+    return {'type': 'error', 'err_msg': "Unknown message", 'status_code': 400, 'msg': msg}
+
 
 @live_api.route("/get_message/<wq_id>/", methods=["GET"])
 @api_login(required_priv=['W'], allow_readonly=False)
@@ -35,23 +66,8 @@ def get_message(wq_id, **_):
      "msg": ""           # Message
     }
     """
-    msg = NamedQueue(wq_id).pop(blocking=False)
-
-    if msg is None:
-        response = {'type': 'timeout', 'err_msg': 'Timeout waiting for a message.', 'status_code': 408, 'msg': None}
-    elif msg['status'] == 'STOP':
-        response = {'type': 'stop', 'err_msg': None, 'status_code': 200,
-                    'msg': "All messages received, closing queue..."}
-    elif msg['status'] == 'START':
-        response = {'type': 'start', 'err_msg': None, 'status_code': 200, 'msg': "Start listening..."}
-    elif msg['status'] == 'OK':
-        response = {'type': 'cachekey', 'err_msg': None, 'status_code': 200, 'msg': msg['cache_key']}
-    elif msg['status'] == 'FAIL':
-        response = {'type': 'cachekeyerr', 'err_msg': None, 'status_code': 200, 'msg': msg['cache_key']}
-    else:
-        response = {'type': 'error', 'err_msg': "Unknown message", 'status_code': 400, 'msg': msg}
-
-    return make_api_response(response)
+    msg = get_queue(wq_id).pop(blocking=False)
+    return make_api_response(_parse_message(msg))
 
 
 @live_api.route("/get_message_list/<wq_id>/", methods=["GET"])
@@ -75,29 +91,45 @@ def get_messages(wq_id, **_):
     Result example:
     []            # List of messages
     """
-    resp_list = []
-    u = NamedQueue(wq_id)
+    return make_api_response([_parse_message(msg) for msg in drain_queue(get_queue(wq_id))])
 
-    while True:
-        msg = u.pop(blocking=False)
-        if msg is None:
-            break
 
-        elif msg['status'] == 'STOP':
-            response = {'type': 'stop', 'err_msg': None, 'status_code': 200,
-                        'msg': "All messages received, closing queue..."}
-        elif msg['status'] == 'START':
-            response = {'type': 'start', 'err_msg': None, 'status_code': 200, 'msg': "Start listening..."}
-        elif msg['status'] == 'OK':
-            response = {'type': 'cachekey', 'err_msg': None, 'status_code': 200, 'msg': msg['cache_key']}
-        elif msg['status'] == 'FAIL':
-            response = {'type': 'cachekeyerr', 'err_msg': None, 'status_code': 200, 'msg': msg['cache_key']}
-        else:
-            response = {'type': 'error', 'err_msg': "Unknown message", 'status_code': 400, 'msg': msg}
+@live_api.route("/stream/<wq_id>/", methods=["GET"])
+@api_login(required_priv=['W'], allow_readonly=False)
+def stream_messages(wq_id, **_):
+    """
+    Stream the messages of a live watch queue as server-sent events.
+    Note: Each message is pushed to the client as soon as it is
+          received. The stream is closed once the STOP message is
+          received or if no message was received for 30 seconds.
+
+    Variables:
+    wq_id       => Queue to get the messages from
+
+    Arguments:
+    None
 
-        resp_list.append(response)
+    Data Block:
+    None
+
+    Result example:
+    event: cachekey     # Type of message
+    data: {             # Message in the same format as get_message
+     "type": "cachekey",
+     "err_msg": null,
+     "status_code": 200,
+     "msg": ""
+    }
+    """
+    def events():
+        u = get_queue(wq_id)
+        while True:
+            response = _parse_message(u.pop(timeout=STREAM_TIMEOUT))
+            yield response['type'], response
+            if response['type'] in ['stop', 'timeout']:
+                break
 
-    return make_api_response(resp_list)
+    return stream_event_response(events())
 
 
 @live_api.route("/outstanding_services/<sid>/", methods=["GET"])
@@ -123,7 +155,9 @@ def outstanding_services(sid, **kwargs):
     user = kwargs['user']
 
     if user and data and Classification.is_accessible(user['classification'], data['classification']):
-        return make_api_response(DispatchClient(datastore=STORAGE).outstanding_services(sid))
+        # The dispatcher answers this on a reply queue, the request/reply round trips are owned by the
+        # DispatchClient. They cannot be fused in a Lua script since redis does not block inside scripts.
+        return make_api_response(dispatch_client.outstanding_services(sid))
     else:
         return make_api_response({}, "You are not allowed to access this submissions.", 403)
 
@@ -150,7 +184,7 @@ def setup_watch_queue(sid, **kwargs):
     user = kwargs['user']
 
     if user and data and Classification.is_accessible(user['classification'], data['classification']):
-        wq_id = DispatchClient(datastore=STORAGE).setup_watch_queue(sid)
+        wq_id = dispatch_client.setup_watch_queue(sid)
         if wq_id:
             return make_api_response({"wq_id": wq_id})
         return make_api_response("", "No dispatchers are processing this submission.", 404)
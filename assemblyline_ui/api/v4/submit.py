@@ -396,8 +396,7 @@ def submit(**kwargs):
             else:
                 return make_api_response({}, "Missing file to scan. No binary, sha256 or url provided.", 400)
         else:
-            with open(out_file, "wb") as my_file:
-                my_file.write(binary.read())
+            binary.save(out_file)
 
         try:
             metadata = flatten(data.get('metadata', {}))
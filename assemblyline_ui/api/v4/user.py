@@ -10,8 +10,8 @@ from assemblyline_ui.api.base import api_login, make_api_response, make_subapi_b
 from assemblyline_ui.config import APPS_LIST, CLASSIFICATION, LOGGER, STORAGE, UI_MESSAGING, VERSION, config
 from assemblyline_ui.helper.search import list_all_fields
 from assemblyline_ui.helper.service import simplify_service_spec, ui_to_submission_params
-from assemblyline_ui.helper.user import (get_dynamic_classification, load_user_settings, save_user_account,
-                                         save_user_settings)
+from assemblyline_ui.helper.user import (get_dynamic_classification, invalidate_user_submission_params,
+                                         load_user_settings, save_user_account, save_user_settings)
 from assemblyline_ui.http_exceptions import AccessDeniedException, InvalidDataException
 
 SUB_API = 'user'
@@ -293,6 +293,7 @@ def remove_user_account(username, **_):
         avatar_deleted = STORAGE.user_avatar.delete(username)
         favorites_deleted = STORAGE.user_favorites.delete(username)
         settings_deleted = STORAGE.user_settings.delete(username)
+        invalidate_user_submission_params(username)
 
         if not user_deleted or not avatar_deleted or not favorites_deleted or not settings_deleted:
             return make_api_response({"success": False})
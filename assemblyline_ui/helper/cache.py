@@ -0,0 +1,46 @@
+import threading
+import time
+
+
+class TTLCache:
+    """Small thread-safe in-process cache where entries expire after a fixed time to live."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            item = self._data.get(key, None)
+            if item is None:
+                return default
+            if item[0] < time.monotonic():
+                self._data.pop(key, None)
+                return default
+            return item[1]
+
+    def set(self, key, value):
+        now = time.monotonic()
+        with self._lock:
+            if key not in self._data and len(self._data) >= self.maxsize:
+                # Drop expired entries first, then everything if the cache is still full
+                for k in [k for k, v in self._data.items() if v[0] < now]:
+                    self._data.pop(k, None)
+                if len(self._data) >= self.maxsize:
+                    self._data.clear()
+            self._data[key] = (now + self.ttl, value)
+
+    def pop(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def pop_matching(self, predicate):
+        with self._lock:
+            for k in [k for k in self._data if predicate(k)]:
+                self._data.pop(k, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
@@ -0,0 +1,30 @@
+import functools
+import json
+
+from assemblyline.remote.datatypes import retry_call
+from assemblyline.remote.datatypes.queues.named import NamedQueue
+
+
+@functools.lru_cache(maxsize=4096)
+def get_queue(name: str, host=None, port=None) -> NamedQueue:
+    """Return a shared NamedQueue handle so repeated requests on the same queue do not rebuild it."""
+    return NamedQueue(name, host=host, port=port)
+
+
+def _drain(client, name):
+    with client.pipeline() as pipe:
+        pipe.lrange(name, 0, -1)
+        pipe.delete(name)
+        items, _ = pipe.execute()
+    return items
+
+
+def drain_queue(queue: NamedQueue) -> list:
+    """Pop all messages currently in the queue using a single transaction (one round trip to redis)."""
+    return [json.loads(item) for item in retry_call(_drain, queue.c, queue.name)]
+
+
+def push_batch(queue: NamedQueue, messages: list):
+    """Push messages at the tail of the queue using a single variadic RPUSH (one round trip to redis)."""
+    if messages:
+        retry_call(queue.c.rpush, queue.name, *[json.dumps(message) for message in messages])
@@ -1,3 +1,5 @@
+import copy
+
 from typing import Optional
 
 from assemblyline.common.str_utils import safe_str
@@ -5,10 +7,16 @@ from assemblyline.odm.models.user import User
 from assemblyline.odm.models.user_settings import UserSettings
 from assemblyline_ui.config import LOGGER, STORAGE, SUBMISSION_TRACKER, config, CLASSIFICATION as Classification, \
     SERVICE_LIST
-from assemblyline_ui.helper.service import get_default_service_spec, get_default_service_list, simplify_services
+from assemblyline_ui.helper.cache import TTLCache
+from assemblyline_ui.helper.service import get_default_service_spec, get_default_service_list, simplify_services, \
+    ui_to_submission_params
 from assemblyline_ui.http_exceptions import AccessDeniedException, InvalidDataException, AuthenticationException
 
 ACCOUNT_USER_MODIFIABLE = ["name", "avatar", "groups", "password"]
+# Users' default submission parameters keyed on (username, classification), the only inputs they are built from.
+# Only the cache of the current process is invalidated when the settings change, the other workers can keep
+# using the previous parameters until their entry expires (60 seconds).
+SUBMISSION_PARAMS_CACHE = TTLCache(maxsize=4096, ttl=60)
 
 
 ###########################
@@ -157,7 +165,24 @@ def load_user_settings(user):
     return settings
 
 
+def load_user_submission_params(user):
+    """Return a copy of the user's default submission parameters, cached for a short period of time."""
+    key = (user['uname'], user['classification'])
+    params = SUBMISSION_PARAMS_CACHE.get(key)
+    if params is None:
+        params = ui_to_submission_params(load_user_settings(user))
+        SUBMISSION_PARAMS_CACHE.set(key, params)
+
+    return copy.deepcopy(params)
+
+
+def invalidate_user_submission_params(username):
+    SUBMISSION_PARAMS_CACHE.pop_matching(lambda key: key[0] == username)
+
+
 def save_user_settings(username, data):
     data["services"] = {'selected': simplify_services(data["services"])}
 
-    return STORAGE.user_settings.save(username, data)
+    success = STORAGE.user_settings.save(username, data)
+    invalidate_user_submission_params(username)
+    return success
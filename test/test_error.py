@@ -44,3 +44,15 @@ def test_list_error(datastore, login_session):
 
     resp = get_api_data(session, f"{host}/api/v4/error/list/")
     assert resp['total'] == NUM_ERRORS
+
+
+# noinspection PyUnusedLocal
+def test_list_error_etag(datastore, login_session):
+    _, session, host = login_session
+
+    resp = session.get(f"{host}/api/v4/error/list/", verify=False)
+    assert resp.status_code == 200
+    etag = resp.headers['ETag']
+
+    resp = session.get(f"{host}/api/v4/error/list/", headers={'If-None-Match': etag}, verify=False)
+    assert resp.status_code == 304
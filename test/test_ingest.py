@@ -1,11 +1,13 @@
 import hashlib
 import json
+import math
 import os
 import pytest
 import random
 import tempfile
+import time
 
-from conftest import get_api_data
+from conftest import get_api_data, APIError
 
 from assemblyline.common import forge
 from assemblyline.odm.messages.submission import Submission
@@ -72,6 +74,90 @@ def test_ingest_hash(datastore, login_session):
     assert msg.metadata['ingest_id'] == resp['ingest_id']
 
 
+# noinspection PyUnusedLocal
+def test_ingest_hash_no_reupload(datastore, filestore, login_session):
+    _, session, host = login_session
+
+    transport = filestore.transports[-1]
+    if not hasattr(transport, 'client'):
+        pytest.skip("Filestore modification time can only be checked on S3")
+
+    sha256 = random.choice(file_hashes)
+
+    def last_modified():
+        return transport.client.head_object(Bucket=transport.bucket, Key=transport.normalize(sha256))['LastModified']
+
+    # A file downloaded from the filestore must not be written back to it
+    before = last_modified()
+    time.sleep(1)
+
+    iq.delete()
+    data = {'sha256': sha256, 'name': 'random_hash.txt'}
+    resp = get_api_data(session, f"{host}/api/v4/ingest/", method="POST", data=json.dumps(data))
+    assert isinstance(resp['ingest_id'], str)
+    assert last_modified() == before
+
+
+# noinspection PyUnusedLocal
+def test_ingest_user_settings(datastore, login_session):
+    _, session, host = login_session
+    data = {'sha256': random.choice(file_hashes), 'name': 'random_hash.txt'}
+
+    # Ingest once so the user's default submission parameters are cached
+    iq.delete()
+    get_api_data(session, f"{host}/api/v4/ingest/", method="POST", data=json.dumps(data))
+
+    # Changing the user's settings must be reflected on the next ingest
+    uset = get_api_data(session, f"{host}/api/v4/user/settings/admin/")
+    uset['description'] = get_random_phrase()
+    resp = get_api_data(session, f"{host}/api/v4/user/settings/admin/", method="POST", data=json.dumps(uset))
+    assert resp['success']
+
+    iq.delete()
+    resp = get_api_data(session, f"{host}/api/v4/ingest/", method="POST", data=json.dumps(data))
+    msg = Submission(iq.pop(blocking=False))
+    assert msg.metadata['ingest_id'] == resp['ingest_id']
+    assert msg.params.description == uset['description']
+
+
+# noinspection PyUnusedLocal
+def test_ingest_bulk(datastore, login_session):
+    _, session, host = login_session
+
+    iq.delete()
+    data = [{
+        'sha256': sha256,
+        'metadata': {'test': 'ingest_bulk'},
+        'notification_queue': TEST_QUEUE
+    } for sha256 in file_hashes]
+    resp = get_api_data(session, f"{host}/api/v4/ingest/bulk/", method="POST", data=json.dumps(data))
+    assert len(resp['ingest_ids']) == NUM_FILES
+
+    for ingest_id, sha256 in zip(resp['ingest_ids'], file_hashes):
+        msg = Submission(iq.pop(blocking=False))
+        assert msg.metadata['ingest_id'] == ingest_id
+        assert msg.files[0].sha256 == sha256
+
+
+# noinspection PyUnusedLocal
+def test_ingest_bulk_invalid(datastore, login_session):
+    _, session, host = login_session
+
+    iq.delete()
+    data = [{'sha256': sha256, 'notification_queue': TEST_QUEUE} for sha256 in file_hashes]
+    data.append({'sha256': "0" * 64, 'notification_queue': TEST_QUEUE})
+    with pytest.raises(APIError, match=f"Submission #{NUM_FILES}: "):
+        get_api_data(session, f"{host}/api/v4/ingest/bulk/", method="POST", data=json.dumps(data))
+
+    # Nothing is queued when one of the submissions is invalid
+    assert iq.length() == 0
+
+    data = [{'sha256': file_hashes[0]}] * 101
+    with pytest.raises(APIError, match="Too many submissions"):
+        get_api_data(session, f"{host}/api/v4/ingest/bulk/", method="POST", data=json.dumps(data))
+    assert iq.length() == 0
+
+
 # noinspection PyUnusedLocal
 def test_ingest_url(datastore, login_session):
     _, session, host = login_session
@@ -154,3 +240,36 @@ def test_get_message_list(datastore, login_session):
     resp = get_api_data(session, f"{host}/api/v4/ingest/get_message_list/{TEST_QUEUE}/")
     for x in range(NUM_FILES):
         assert resp[x] == messages[x]
+
+
+# noinspection PyUnusedLocal
+def test_get_message_list_json_values(datastore, login_session):
+    _, session, host = login_session
+
+    # Values json accepts but which are not strict JSON must come out of the queue unchanged
+    nq.delete()
+    nq.push({"value": float("nan"), "big": 2 ** 70})
+
+    resp = get_api_data(session, f"{host}/api/v4/ingest/get_message_list/{TEST_QUEUE}/")
+    assert len(resp) == 1
+    assert math.isnan(resp[0]["value"])
+    assert resp[0]["big"] == 2 ** 70
+
+
+# noinspection PyUnusedLocal
+def test_stream_messages(datastore, login_session):
+    _, session, host = login_session
+
+    nq.delete()
+    messages = []
+    for x in range(NUM_FILES):
+        test_message = random_model_obj(Submission).as_primitives()
+        messages.append(test_message)
+        nq.push(test_message)
+
+    resp = get_api_data(session, f"{host}/api/v4/ingest/stream/{TEST_QUEUE}/",
+                        params={'timeout': 1}, raw=True).decode()
+    events = [json.loads(line[6:]) for line in resp.splitlines() if line.startswith("data: ")]
+    assert events[-1] is None
+    for x in range(NUM_FILES):
+        assert events[x] == messages[x]
@@ -1,3 +1,4 @@
+import json
 import pytest
 
 from conftest import get_api_data, APIError
@@ -56,6 +57,26 @@ def test_get_message_list(datastore, login_session):
         assert resp[x]['msg'] == msgs[x]
 
 
+# noinspection PyUnusedLocal
+def test_stream_messages(datastore, login_session):
+    _, session, host = login_session
+
+    msgs = []
+    wq.push({'status': "START"})
+    for x in range(10):
+        r = random_model_obj(Result)
+        wq.push({'status': "OK", 'cache_key': r.build_key()})
+        msgs.append(r.build_key())
+    wq.push({'status': "STOP"})
+
+    resp = get_api_data(session, f"{host}/api/v4/live/stream/{wq_id}/", raw=True).decode()
+    events = [json.loads(line[6:]) for line in resp.splitlines() if line.startswith("data: ")]
+    assert events[0]['type'] == 'start'
+    assert events[-1]['type'] == 'stop'
+    for x in range(10):
+        assert events[x + 1]['msg'] == msgs[x]
+
+
 # noinspection PyUnusedLocal
 def test_outstanding_services(datastore, login_session):
     _, session, host = login_session